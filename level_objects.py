@@ -2,23 +2,30 @@ import pygame
 import random
 
 
-class BaseObject(pygame.sprite.Sprite):
+class BaseObject(pygame.sprite.DirtySprite):
     """
     Load level map and store information about level objects.
 
     Attributes:
         ANIMATION_SPEED: (class attribute) Time between sprite changes.
+        HAS_ANIMATION: (class attribute) Object has several sprites and should be animated.
+        SPRITE_ART_SIZE: (class attribute) Sprite size the images in files are drawn for.
         sprite_filenames: (class attribute)List of filenames with sprites.
+        _sprite_cache: (class attribute) Sprites already loaded from files, shared by all instances.
 
         sprite_size: Sprite size.
         self.sprites: Sprites loaded from files.
+        self._n_sprites: Number of sprites in animation.
         self.sprite_animation_index: Current sprite index(animation)
         self.next_animation_time: At this time we can change sprite(animation)
 
-        self.surf: The current sprite that is being displayed.
+        self.image: The current sprite that is being displayed.
     """
     ANIMATION_SPEED = 150
+    HAS_ANIMATION = False
+    SPRITE_ART_SIZE = 32
     sprite_filenames = ["sprites/block.png"]
+    _sprite_cache: dict[tuple, list[pygame.Surface]] = {}
 
     def __init__(self, x: float, y: float, sprite_size: int):
         """
@@ -37,24 +44,58 @@ class BaseObject(pygame.sprite.Sprite):
         self._load_sprites()
 
         # Set current sprite
-        self.surf: pygame.Surface = self.sprites[0]
-        self.surf.set_colorkey((255, 255, 255), pygame.RLEACCEL)
-        self.rect: pygame.Rect = self.surf.get_rect(left=x, top=y)
+        self.image: pygame.Surface = self.sprites[0]
+        self.rect: pygame.Rect = self.image.get_rect(left=x, top=y)
+        # Animated objects should be redrawn on every frame
+        if self.HAS_ANIMATION:
+            self.dirty = 2
 
     def _load_sprites(self) -> None:
-        """Load sprites from files"""
-        for filename in self.sprite_filenames:
-            self.sprites.append(pygame.image.load(filename).convert_alpha())
+        """Load sprites from files. Every file is loaded only once, the sprites are shared between objects.
 
-    def animate(self):
-        """Change current sprite to the next in animation"""
+        Sprites are scaled to the sprite size once when they are loaded. Images drawn for the target size are
+        preferred, scaling is only a fallback for other sprite sizes.
+        """
+        key = (tuple(self.sprite_filenames), self.sprite_size)
+        cached = BaseObject._sprite_cache.get(key)
+        if cached is None:
+            cached = []
+            for filename in self.sprite_filenames:
+                sprite = pygame.image.load(filename)
+                # Some files already have a colorkey(palettized fires use black), it should be kept
+                colorkey = sprite.get_colorkey()
+                # Opaque sprites use only the colorkey, so RLEACCEL can speed up their blits.
+                # Keep per-pixel alpha only for sprites that have it.
+                if sprite.get_flags() & pygame.SRCALPHA:
+                    sprite = sprite.convert_alpha()
+                else:
+                    sprite = sprite.convert()
+                # Scale the image proportionally, so objects keep their size relative to the level grid.
+                # Smoothscale would blend the colorkey color into the edges.
+                if self.sprite_size != self.SPRITE_ART_SIZE:
+                    width, height = sprite.get_size()
+                    sprite = pygame.transform.scale(sprite, (
+                        round(width * self.sprite_size / self.SPRITE_ART_SIZE),
+                        round(height * self.sprite_size / self.SPRITE_ART_SIZE)
+                    ))
+                sprite.set_colorkey(colorkey or (255, 255, 255), pygame.RLEACCEL)
+                cached.append(sprite)
+            BaseObject._sprite_cache[key] = cached
+        self.sprites = cached
+        self._n_sprites = len(cached)
+
+    def animate(self, now: int) -> None:
+        """Change current sprite to the next in animation
+
+        Args:
+            now: Current time in milliseconds(pygame.time.get_ticks()).
+        """
         # Check that object has several sprites and it's time to change sprite
-        if len(self.sprites) > 1 and pygame.time.get_ticks() - self.next_animation_time > 0:
-            # Take next sprite
-            self.sprite_animation_index += 1
-            # Index should not be greater than the length
-            self.sprite_animation_index %= len(self.sprites)
-            self.surf = self.sprites[self.sprite_animation_index]
+        if self._n_sprites > 1 and now - self.next_animation_time > 0:
+            # Take next sprite, start again after the last one
+            next_index = self.sprite_animation_index + 1
+            self.sprite_animation_index = 0 if next_index == self._n_sprites else next_index
+            self.image = self.sprites[self.sprite_animation_index]
             # Set time for the next animation
             self.next_animation_time = self.next_animation_time + self.ANIMATION_SPEED
 
@@ -71,6 +112,7 @@ class LevelExit(BaseObject):
 
 class Fire(BaseObject):
     """Dangerous object. The player should die if hits this object"""
+    HAS_ANIMATION = True
     sprite_filenames = ["sprites/fire.png", "sprites/fire1.png",
                         "sprites/fire2.png", "sprites/fire3.png",
                         "sprites/fire4.png", "sprites/fire5.png",
@@ -79,6 +121,7 @@ class Fire(BaseObject):
 
 class BlueFire(BaseObject):
     """Dangerous object. The player should die if hits this object"""
+    HAS_ANIMATION = True
     sprite_filenames = ["sprites/bluefire.png", "sprites/bluefire1.png",
                         "sprites/bluefire2.png", "sprites/bluefire3.png",
                         "sprites/bluefire4.png", "sprites/bluefire5.png",
@@ -89,15 +132,18 @@ class Player(BaseObject):
     """The player himself.
 
     Attributes:
-        FALL_ACCELERATION: (class attribute) The acceleration of a player's fall.
+        FALL_ACCEL_Q8: (class attribute) The acceleration of a player's fall in 1/256 of a pixel(about 0.3).
         MOVE_SPEED: (class attribute) The speed of the player when moving left and right.
         JUMP_SPEED: (class attribute) Initial speed when jumping.
+        _left_cache: (class attribute) Mirrored sprites for left movement, shared by all players.
     """
+    HAS_ANIMATION = True
     sprite_filenames = ["sprites/player.png", "sprites/player1.png",
                         "sprites/player2.png", "sprites/player3.png",]
-    FALL_ACCELERATION: float = 0.3
+    FALL_ACCEL_Q8: int = 77
     MOVE_SPEED: int = 2
     JUMP_SPEED: int = 10
+    _left_cache: dict[tuple, list[pygame.Surface]] = {}
 
     def __init__(self, x: float, y: float, sprite_size: int):
         """
@@ -111,84 +157,113 @@ class Player(BaseObject):
         self.bottom_collision: bool = False
 
         self.horizontal_speed: int = 0
+        # Vertical speed is a fixed-point number in 1/256 of a pixel
         self.vertical_speed: int = 0
 
     def _load_sprites(self):
         """Load sprites from files. For player we should have different sprites for left and right movement."""
         super()._load_sprites()
         self.sprites_right = self.sprites
-        # Mirror sprites for left movement.
-        self.sprites_left = [pygame.transform.flip(sprite, True, False) for sprite in self.sprites]
-
-    def update(self, pressed_keys: pygame.key.ScancodeWrapper, level_objects: pygame.sprite.Group) -> None:
+        # Mirror sprites for left movement. Mirrored sprites are cached too.
+        key = (tuple(self.sprite_filenames), self.sprite_size)
+        sprites_left = Player._left_cache.get(key)
+        if sprites_left is None:
+            sprites_left = []
+            for sprite in self.sprites:
+                sprite = pygame.transform.flip(sprite, True, False)
+                sprite.set_colorkey((255, 255, 255), pygame.RLEACCEL)
+                sprites_left.append(sprite)
+            Player._left_cache[key] = sprites_left
+        self.sprites_left = sprites_left
+
+    def update(self, keys_down: set[int], level_rects: list[pygame.Rect]) -> None:
         """Change the player's position in response to keypresses.
 
         Args:
-            pressed_keys: Keys pressed by the user.
-            level_objects: Level objects
+            keys_down: Keys that are currently held down by the user.
+            level_rects: Rects of level objects
         """
         # Player can't jump in the air
         self.horizontal_speed = 0
         # Jump
-        if pressed_keys[pygame.K_UP] and self.bottom_collision:
-            self.vertical_speed = -self.JUMP_SPEED
+        if pygame.K_UP in keys_down and self.bottom_collision:
+            self.vertical_speed = -self.JUMP_SPEED << 8
         # Move left
-        if pressed_keys[pygame.K_LEFT]:
+        if pygame.K_LEFT in keys_down:
             # Change sprites(player should look to the left)
             self.sprites = self.sprites_left
             self.horizontal_speed = -self.MOVE_SPEED
         # Move right
-        if pressed_keys[pygame.K_RIGHT]:
+        if pygame.K_RIGHT in keys_down:
             # Change sprites(player should look to the left)
             self.sprites = self.sprites_right
             self.horizontal_speed = self.MOVE_SPEED
 
         # Check collisions with other objects
-        self._movement_with_collision(level_objects)
+        self._movement_with_collision(level_rects)
 
         # If the player is not standing on the surface, increase the fall speed.
         if not self.bottom_collision:
-            self.vertical_speed += self.FALL_ACCELERATION
+            self.vertical_speed += self.FALL_ACCEL_Q8
 
-    def _movement_with_collision(self, level_objects: pygame.sprite.Group) -> None:
+    def _movement_with_collision(self, level_rects: list[pygame.Rect]) -> None:
         """Check collisions. Stop player if necessary and fix objects overlapping
 
         Args:
-            level_objects: level objects
+            level_rects: Rects of level objects
         """
-        self.bottom_collision: bool = False
+        # Local names are faster than attribute lookups in the loops below
+        rect = self.rect
+        move_ip = rect.move_ip
+        horizontal_speed = self.horizontal_speed
+        vertical_speed = self.vertical_speed
+        bottom_collision = False
 
         # First check horizontal collisions(don't move sprite vertically)
-        self.rect.move_ip(self.horizontal_speed, 0)
-        for level_object in level_objects:
-            if level_object.rect.colliderect(self.rect):
+        # Player can't collide with anything if it doesn't move
+        if horizontal_speed != 0:
+            move_ip(horizontal_speed, 0)
+            for i in rect.collidelistall(level_rects):
+                level_rect = level_rects[i]
                 # Player moves right
-                if self.horizontal_speed > 0 and self.rect.right >= level_object.rect.left:
-                    self.horizontal_speed = 0
+                if horizontal_speed > 0 and rect.right >= level_rect.left:
+                    horizontal_speed = 0
                     # Fix overlap
-                    self.rect.move_ip(level_object.rect.left - self.rect.right, 0)
+                    move_ip(level_rect.left - rect.right, 0)
                 # Sprite moves left
-                elif self.horizontal_speed < 0 and self.rect.left <= level_object.rect.right:
+                elif horizontal_speed < 0 and rect.left <= level_rect.right:
                     # Stop
-                    self.horizontal_speed = 0
+                    horizontal_speed = 0
                     # Player shouldn't overlap the object
-                    self.rect.move_ip(level_object.rect.right - self.rect.left, 0)
+                    move_ip(level_rect.right - rect.left, 0)
 
         # Check vertical collisions
-        self.rect.move_ip(0, self.vertical_speed)
-        for level_object in level_objects:
-            if level_object.rect.colliderect(self.rect):
+        if vertical_speed != 0:
+            # Move by whole pixels, rounded towards zero
+            if vertical_speed > 0:
+                move_ip(0, vertical_speed >> 8)
+            else:
+                move_ip(0, -(-vertical_speed >> 8))
+            for i in rect.collidelistall(level_rects):
+                level_rect = level_rects[i]
                 # Player moves down and collides with an object
-                if self.vertical_speed > 0 and self.rect.bottom > level_object.rect.top:
+                if vertical_speed > 0 and rect.bottom > level_rect.top:
                     # Stop
-                    self.vertical_speed = 0
+                    vertical_speed = 0
                     # Mark that player is standing on something
-                    self.bottom_collision = True
+                    bottom_collision = True
                     # Player shouldn't overlap the object
-                    self.rect.move_ip(0, level_object.rect.top - self.rect.bottom)
+                    move_ip(0, level_rect.top - rect.bottom)
                 # Player moves up
-                elif self.vertical_speed < 0 and self.rect.top <= level_object.rect.bottom:
+                elif vertical_speed < 0 and rect.top <= level_rect.bottom:
                     # Stop
-                    self.vertical_speed = 0
+                    vertical_speed = 0
                     # Player shouldn't overlap the object
-                    self.rect.move_ip(0, level_object.rect.bottom - self.rect.top)
\ No newline at end of file
+                    move_ip(0, level_rect.bottom - rect.top)
+        else:
+            # Player doesn't move vertically, check that there is something right under it
+            bottom_collision = rect.move(0, 1).collidelist(level_rects) != -1
+
+        self.horizontal_speed = horizontal_speed
+        self.vertical_speed = vertical_speed
+        self.bottom_collision = bottom_collision
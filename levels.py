@@ -1,5 +1,17 @@
 import pygame
-from level_objects import Block, Fire, BlueFire, LevelExit, Player
+from level_objects import BaseObject, Block, Fire, BlueFire, LevelExit, Player
+
+
+# Map cell -> object class and name of the level group for it
+CELL_FACTORY: dict[str, tuple[type[BaseObject], str]] = {
+    # Safe blocks that won't kill you
+    "B": (Block, "safe_objects"),
+    # Traps that can kill you
+    "T": (Fire, "traps"),
+    "t": (BlueFire, "traps"),
+    # Exit from the level
+    "E": (LevelExit, "exits"),
+}
 
 
 class Level:
@@ -7,31 +19,49 @@ class Level:
 
     Attributes:
         _sprite_size: Sprite size
+        _view_rect: Visible part of the level. The whole level is visible if it's None.
 
         all_objects: A group of all level objects.
         safe_objects: A group of objects except traps and exits.
         traps: A group of objects that can kill the player.
         exits: A group of objects that allow to successfully complete a level.
+        animated_objects: A group of objects with animation. They are redrawn on every frame.
+        background: Static objects(safe objects and exits) drawn once when the level is loaded.
+        exit_rects: Rects of exits.
+        trap_rects: Rects of traps.
+        visible_traps: Traps inside the visible part of the level. Only they are animated. On the current maps
+            every trap is visible, this only saves work with a camera or maps larger than the screen.
+        _grid: Rects of safe objects for every map cell, row by row. Used for collision checks.
+        _grid_columns: Number of map columns.
 
         player: Store information about player. Initialized when the level is loaded.
     """
 
-    def __init__(self, name: str, map_filename: str, sprite_size) -> None:
+    def __init__(self, name: str, map_filename: str, sprite_size, view_rect: pygame.Rect | None = None) -> None:
         """
         Args:
             name: level name
             map_filename: text file with level map
             sprite_size: sprite size
+            view_rect: visible part of the level(screen rect)
         """
         super().__init__()
         self.name = name
         self._sprite_size = sprite_size
+        self._view_rect = view_rect
 
         self.player: Player | None = None
         self.all_objects: pygame.sprite.Group = pygame.sprite.Group()
         self.safe_objects: pygame.sprite.Group = pygame.sprite.Group()
         self.traps: pygame.sprite.Group = pygame.sprite.Group()
         self.exits: pygame.sprite.Group = pygame.sprite.Group()
+        self.animated_objects: pygame.sprite.LayeredDirty = pygame.sprite.LayeredDirty()
+        self.background: pygame.Surface | None = None
+        self.exit_rects: list[pygame.Rect] = []
+        self.trap_rects: list[pygame.Rect] = []
+        self.visible_traps: list[BaseObject] = []
+        self._grid: list[list[pygame.Rect]] = []
+        self._grid_columns: int = 0
 
         self.load_map(map_filename)
 
@@ -42,30 +72,28 @@ class Level:
             filename: Name of the text file with a map
         """
         level_map = self._read_from_file(filename)
+        self._grid_columns = max((len(row) for row in level_map), default=0)
+        self._grid = [[] for _ in range(self._grid_columns * len(level_map))]
         # Loop through level map and create objects
         for row_num, row in enumerate(level_map):
             for column_num, cell in enumerate(row):
+                # Empty cell
+                if cell == "_":
+                    continue
                 # Calculate screen coordinates
                 x = column_num * self._sprite_size
                 y = row_num * self._sprite_size
 
-                # Safe blocks that won't kill you
-                if cell == "B":
-                    block = Block(x, y, self._sprite_size)
-                    self.safe_objects.add(block)
-                # Trap that can kill you
-                if cell == "T":
-                    trap = Fire(x, y, self._sprite_size)
-                    self.traps.add(trap)
-                if cell == "t":
-                    trap = BlueFire(x, y, self._sprite_size)
-                    self.traps.add(trap)
-                # Exit from the level
-                if cell == "E":
-                    level_exit = LevelExit(x, y, self._sprite_size)
-                    self.exits.add(level_exit)
+                entry = CELL_FACTORY.get(cell)
+                if entry is not None:
+                    cls, group_name = entry
+                    level_object = cls(x, y, self._sprite_size)
+                    getattr(self, group_name).add(level_object)
+                    # Safe objects are used for collision checks
+                    if group_name == "safe_objects":
+                        self._grid[row_num * self._grid_columns + column_num].append(level_object.rect)
                 # Player
-                if cell == "P":
+                elif cell == "P":
                     if self.player is not None:
                         raise ValueError("You can have only one player on the level. Please check your map.")
                     self.player: Player = Player(x, y, self._sprite_size)
@@ -74,27 +102,70 @@ class Level:
         self.all_objects.add(self.safe_objects)
         self.all_objects.add(self.traps)
         self.all_objects.add(self.exits)
+        # Static objects don't need to be animated on every update
+        self.animated_objects.add(obj for obj in self.all_objects if obj.HAS_ANIMATION)
+
+        # Draw static objects on the background
+        self.background = pygame.Surface(
+            (self._grid_columns * self._sprite_size, len(level_map) * self._sprite_size)
+        ).convert()
+        self.safe_objects.draw(self.background)
+        self.exits.draw(self.background)
+
+        self.exit_rects = [level_exit.rect for level_exit in self.exits]
+        traps = list(self.traps)
+        self.trap_rects = [trap.rect for trap in traps]
 
-    def update(self, pressed_keys: pygame.key.ScancodeWrapper) -> None:
+        # Traps don't move, so we can find the visible ones once
+        view_rect = self._view_rect if self._view_rect is not None else self.background.get_rect()
+        self.visible_traps = [traps[i] for i in view_rect.collidelistall(self.trap_rects)]
+
+    def update(self, keys_down: set[int]) -> None:
         """Move player and show animations
 
         Args:
-            pressed_keys: Keys that have been pressed by the user
+            keys_down: Keys that are currently held down by the user
         """
-        self.player.update(pressed_keys, self.safe_objects)
+        # Only safe objects near the player can collide with him during this update
+        area = self.player.rect.inflate(
+            2 * Player.MOVE_SPEED,
+            2 * max(Player.JUMP_SPEED, (abs(self.player.vertical_speed) >> 8) + 1)
+        )
+        self.player.update(keys_down, self.query_cells(area))
+
+        # Animate the player and traps that can be seen
+        now = pygame.time.get_ticks()
+        self.player.animate(now)
+        for trap in self.visible_traps:
+            trap.animate(now)
+
+    def query_cells(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        """Get rects of safe objects from all map cells that the rect overlaps
 
-        # Animate objects
-        for obj in self.all_objects:
-            obj.animate()
+        Args:
+            rect: Area of the level
+        """
+        grid_rows = len(self._grid) // self._grid_columns if self._grid_columns else 0
+        # Cells outside of the map are empty
+        first_column = max(rect.left // self._sprite_size, 0)
+        last_column = min((rect.right - 1) // self._sprite_size, self._grid_columns - 1)
+        first_row = max(rect.top // self._sprite_size, 0)
+        last_row = min((rect.bottom - 1) // self._sprite_size, grid_rows - 1)
+
+        rects = []
+        for row_num in range(first_row, last_row + 1):
+            row_start = row_num * self._grid_columns
+            for cell in self._grid[row_start + first_column:row_start + last_column + 1]:
+                rects.extend(cell)
+        return rects
 
     @staticmethod
-    def _read_from_file(filename: str) -> list[list[str]]:
-        """Read map from text file and convert it to the nested list
+    def _read_from_file(filename: str) -> list[str]:
+        """Read map from text file and split it into rows
 
         Args:
             filename: Name of the text file with a map
         """
         with open(filename, "r") as f:
-            text_map = f.readlines()
-        return [list(row.strip()) for row in text_map]
+            return f.read().splitlines()
 
@@ -12,6 +12,11 @@ SPRITE_SIZE: int = 32
 GREEN = (95, 133, 117)
 RED = (255, 69, 0)
 
+pygame.font.init()
+_FONT: pygame.font.Font = pygame.font.SysFont("arial", 30)
+# Rendered messages by (text, color)
+_TEXT_CACHE: dict[tuple[str, tuple], pygame.Surface] = {}
+
 
 def show_message(text: str, text_color: Sequence[int] = GREEN) -> None:
     """
@@ -20,9 +25,11 @@ def show_message(text: str, text_color: Sequence[int] = GREEN) -> None:
     :param text: text to display on the screen
     :param text_color: text color
     """
-    pygame.font.init()
-    my_font = pygame.font.SysFont("arial", 30)
-    text_surface = my_font.render(text, True, text_color)
+    key = (text, tuple(text_color))
+    text_surface = _TEXT_CACHE.get(key)
+    if text_surface is None:
+        text_surface = _FONT.render(text, True, text_color)
+        _TEXT_CACHE[key] = text_surface
     screen.fill((0, 0, 0))
     text_center_coordinates = (
         SCREEN_WIDTH / 2 - text_surface.get_width() / 2,
@@ -42,32 +49,42 @@ def play(level: Level) -> bool:
     """
     show_message(level.name, GREEN)
     time.sleep(1)
+
+    # Static objects are drawn only once, animated objects are redrawn over the background
+    screen.fill((0, 0, 0))
+    screen.blit(level.background, (0, 0))
+    pygame.display.flip()
+    level.animated_objects.clear(screen, level.background)
+    # Keys that are held down, updated from keyboard events.
+    # Keys held since the previous level(or death) should still work.
+    pressed_keys = pygame.key.get_pressed()
+    keys_down: set[int] = {key for key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP) if pressed_keys[key]}
     while True:
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+            if event.type == pygame.KEYDOWN:
+                keys_down.add(event.key)
+            elif event.type == pygame.KEYUP:
+                keys_down.discard(event.key)
+            elif event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
 
         # Check win conditions
-        if pygame.sprite.spritecollideany(level.player, level.exits):
+        if level.player.rect.collidelist(level.exit_rects) != -1:
             show_message(f"You've completed {level.name}.")
             return True
 
         # Check loose conditions
-        if pygame.sprite.spritecollideany(level.player, level.traps):
+        if level.player.rect.collidelist(level.trap_rects) != -1:
             show_message("GAME OVER", RED)
             return False
 
-        # Clear the screen
-        screen.fill((0, 0, 0))
-        # Draw all objects on the screen
-        for entity in level.all_objects:
-            screen.blit(entity.surf, entity.rect)
+        # Draw animated objects, update only changed parts of the screen
+        dirty_rects = level.animated_objects.draw(screen)
 
-        pressed_keys = pygame.key.get_pressed()
-        level.update(pressed_keys)
+        level.update(keys_down)
 
-        pygame.display.flip()
+        pygame.display.update(dirty_rects)
         clock.tick(120)
 
 
@@ -82,7 +99,7 @@ if __name__ == "__main__":
         # Move to the next level only if the current one is completed successfully.
         win = False
         while not win:
-            current_level = Level(f"Level {i}", file_name, SPRITE_SIZE)
+            current_level = Level(f"Level {i}", file_name, SPRITE_SIZE, screen.get_rect())
             win = play(current_level)
 
     # All levels are complete